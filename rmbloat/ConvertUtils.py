@@ -10,15 +10,24 @@ import re
 from .VideoParser import VideoParser
 
 # Video file extensions recognized by ffmpeg
-VIDEO_EXTENSIONS = {
+VIDEO_EXTENSIONS = frozenset({
     '.mp4', '.mov', '.mkv', '.avi', '.webm', '.flv',
     '.wmv', '.mpg', '.mpeg', '.3gp', '.m4v', '.ts',
     '.vob', '.ogv', '.m2ts', '.mts'
-}
+})
+
+# The same, without the dots, to match what follows the last '.' of a name
+_VIDEO_EXTS_NODOT = frozenset(ext[1:] for ext in VIDEO_EXTENSIONS)
 
 # Filename prefixes to skip during processing (treated as non-video files)
 SKIP_PREFIXES = ('TEMP.', 'ORIG.', 'SAMPLE.')
 
+# Codec/resolution tokens (with their leading separator) that standard_name()
+# drops from a name, and the runs of separators it collapses to a single '.'
+PURGE_RE = re.compile(r'[^a-z0-9](?:[xh]\.?264|avc|xvid|divx|\d+[pik]|UHD)\b',
+                      re.IGNORECASE)
+SEPARATORS_RE = re.compile(r'[\s\.\-]+')
+
 
 def bash_quote(args):
     """
@@ -66,25 +75,70 @@ def human_readable_size(size_bytes: int) -> str:
 def is_valid_video_file(filename):
     """
     Checks if a file meets all the criteria:
-    1. Does not start with 'TEMP.' or 'ORIG.'.
+    1. Its name (not its directory) does not start with 'TEMP.', 'ORIG.' or 'SAMPLE.'.
     2. Has a common video file extension (case-insensitive).
-    """
+    3. For an os.DirEntry, is a regular file (or a symlink to one).
 
-    # 1. Check for prefixes to skip
-    if filename.startswith(SKIP_PREFIXES):
+    Args:
+        filename: File name/path, or an os.DirEntry from os.scandir()
+    """
+    if isinstance(filename, os.DirEntry):
+        entry = filename
+        # Name checks first; is_file() uses the cached d_type (no stat)
+        # except for symlinks
+        return bool(is_valid_video_file(entry.name) and entry.is_file())
+
+    # 1. Check for prefixes to skip (on the last path component, so that
+    #    full paths of SAMPLE. files never reach the list of videos)
+    name = filename.rpartition(os.sep)[2]
+    if name.startswith(SKIP_PREFIXES):
         return False
 
-    # Get the file extension and convert to lowercase for case-insensitive check
-    _, ext = os.path.splitext(filename)
+    # Get the file extension (single scan from the right; as with
+    # os.path.splitext(), leading dots are not extensions, so '.mkv' has none)
+    head, dot, ext = name.rpartition('.')
+    if not head.strip('.'):
+        return False
 
-    # 2. Check if the extension is a recognized video format
-    if ext.lower() not in VIDEO_EXTENSIONS:
+    # 2. Check if the extension is a recognized video format (case-insensitive)
+    if ext.lower() not in _VIDEO_EXTS_NODOT:
         return False
 
     # The file meets all criteria
     return True
 
 
+def _scandir_walk(root):
+    """
+    Recursively yield (dirpath, DirEntry) for each non-directory under root.
+
+    Same order as a top-down os.walk() with the files and subdirectories of
+    each directory sorted case-insensitively, but the DirEntry objects from
+    os.scandir() already know their type, so no stat() is done per entry.
+    Like os.walk(), symlinked directories are not followed.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda entry: entry.name.lower())
+    except OSError:
+        return
+
+    dirs = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            dirs.append(entry)
+        else:
+            yield root, entry
+
+    for entry in dirs:
+        if not entry.is_symlink():
+            yield from _scandir_walk(entry.path)
+
+
 def get_candidate_video_files(file_args):
     """
     Gather candidate video file paths from command-line arguments.
@@ -98,35 +152,36 @@ def get_candidate_video_files(file_args):
             - read_pipe: True if stdin was read (caller needs to restore TTY)
     """
     read_pipe = False
-    enqueued_paths = set()
-    paths_from_args = []
+
+    def raw_paths():
+        """ Yield the path arguments, expanding "-" into the lines of stdin """
+        nonlocal read_pipe
+        for file_arg in file_args:
+            if file_arg == "-":
+                # Handle STDIN
+                if not read_pipe:
+                    read_pipe = True
+                    # stream the lines rather than reading stdin whole
+                    for line in sys.stdin:
+                        yield line.rstrip('\r\n')
+            else:
+                yield file_arg
 
     # 1. Gather all unique, absolute paths from arguments and stdin
-    for file_arg in file_args:
-        if file_arg == "-":
-            # Handle STDIN
-            if not read_pipe:
-                paths_from_args.extend(sys.stdin.read().splitlines())
-                read_pipe = True
-        else:
-            # Convert to absolute path immediately
-            abs_path = os.path.abspath(file_arg)
-            if abs_path not in enqueued_paths:
-                paths_from_args.append(abs_path)
-                enqueued_paths.add(abs_path)
+    #    (dict keys keep first-seen order; empty lines from stdin are ignored)
+    paths_from_args = list(dict.fromkeys(
+        os.path.abspath(path) for path in raw_paths() if path))
+    enqueued_paths = set(paths_from_args)
 
     # 2. Separate into directories and individual files, and sort for processing order
     directories = []
     immediate_files = []
 
     for path in paths_from_args:
-        # Ignore empty lines from stdin
-        if not path:
-            continue
-
         if os.path.isdir(path):
             directories.append(path)
-        else:
+        elif is_valid_video_file(path):
+            # (screen out non-videos now, before paying for an ffprobe of each)
             immediate_files.append(path)
 
     # Sort the list of directories to be processed (case-insensitively)
@@ -144,23 +199,13 @@ def get_candidate_video_files(file_args):
         group_files = []
 
         # Recursively walk the directory structure
-        for root, dirs, files in os.walk(dir_path):
-
-            # Sort the directory names before os.walk processes them (case-insensitive)
-            # This ensures predictable traversal order of subdirectories
-            dirs.sort(key=str.lower)
-
-            # Sort the files within the current directory (case-insensitive)
-            files.sort(key=str.lower)
-
-            for file_name in files:
-                full_path = os.path.join(root, file_name)
-
-                # Check for validity and duplicates
-                if is_valid_video_file(full_path):
-                    if full_path not in enqueued_paths:
-                        group_files.append(full_path)
-                        enqueued_paths.add(full_path)
+        for _, entry in _scandir_walk(dir_path):
+            # Check for validity and duplicates
+            if is_valid_video_file(entry):
+                full_path = entry.path
+                if full_path not in enqueued_paths:
+                    group_files.append(full_path)
+                    enqueued_paths.add(full_path)
 
         # Append all grouped and sorted file paths for the current directory
         paths_to_probe.extend(group_files)
@@ -193,7 +238,7 @@ def standard_name(pathname: str, height: int, quality: int) -> tuple[bool, str]:
     """
     def finish_name(name, basename):
         name += f' {height}p x265-cmf{quality} recode'
-        name = re.sub(r'[\s\.\-]+', '.', name)
+        name = SEPARATORS_RE.sub('.', name)
         # Ensure name doesn't start with a dot
         if name.startswith('.'):
             name = basename.split('.')[0] + name
@@ -216,20 +261,7 @@ def standard_name(pathname: str, height: int, quality: int) -> tuple[bool, str]:
             name = f'{parsed.title} {parsed.year}'
             return finish_name(name, corename)
 
-    name = corename
-
-    # Regular expressions for the codecs/resolutions to be replaced.
-    # The groups will capture the exact string for case-checking later.
-    purges = r'[xh]\.?264|avc|xvid|divx'
-    purges += r'|\d+[pik]|UHD'
-    pattern = r'([^a-z0-9]' + purges + r')\b'
-    regex = re.compile(pattern, re.IGNORECASE)
-    end = 0
-    while True:
-        match = re.search(regex, name[end:])
-        if not match:
-            break
-        start, end = match.span(1)
-        name = name[:start] + name[end:]
+    # Remove every old codec/resolution token in one pass
+    name = PURGE_RE.sub('', corename)
 
     return finish_name(name, corename)
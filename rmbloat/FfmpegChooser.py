@@ -24,7 +24,7 @@ class FfmpegChooser:
     STRATEGIES = ['auto', 'system_accel', 'docker_accel', 'system_cpu', 'docker_cpu']
 
     def __init__(self, force_pull=False, image="joedefen/ffmpeg-vaapi-docker:latest",
-                 prefer_strategy='auto', quiet=False):
+                 prefer_strategy='auto', quiet=False, detect_all=False):
         """
         Initialize and detect the best FFmpeg configuration.
         
@@ -34,6 +34,8 @@ class FfmpegChooser:
             prefer_strategy: Strategy preference - 'auto', 'docker_accel', 'docker_cpu', 
                            'system_cpu', or 'system_accel' (default: 'auto')
             quiet: Suppress detection output (default: False)
+            detect_all: Run the container checks even when system acceleration
+                        makes them moot, e.g. to compare strategies (default: False)
         """
         self.image = image
         self.runtime = None  # 'docker', 'podman', or None
@@ -42,6 +44,7 @@ class FfmpegChooser:
         self.use_docker = False
         self.use_acceleration = False
         self.system_ffmpeg_path = None
+        self.system_ffprobe_path = None
         self.render_device = None
         self.prefer_strategy = prefer_strategy
         self.quiet = quiet
@@ -53,13 +56,21 @@ class FfmpegChooser:
         # Check system ffmpeg first
         self._detect_system_ffmpeg()
         
-        # Detect container runtime
-        self._detect_runtime()
-        
-        # If we have a runtime, ensure image and test acceleration
-        if self.runtime:
-            self._ensure_image(force_pull)
-            self._test_docker_acceleration()
+        # Working system acceleration is the first choice (and the wanted one),
+        # so skip the container checks (docker info, image inspect/pull, and
+        # a test run of the container) that could not change the outcome
+        if (self.has_system_acceleration and not detect_all and not force_pull
+                and prefer_strategy in ('auto', 'system_accel')):
+            if not quiet:
+                print("  → Skipping Docker/Podman checks (system acceleration is preferred)")
+        else:
+            # Detect container runtime
+            self._detect_runtime()
+
+            # If we have a runtime, ensure image and test acceleration
+            if self.runtime:
+                self._ensure_image(force_pull)
+                self._test_docker_acceleration()
         
         # Decide final strategy
         self._decide_strategy()
@@ -70,6 +81,8 @@ class FfmpegChooser:
     def _detect_system_ffmpeg(self):
         """Detect if system ffmpeg exists and test hardware acceleration."""
         self.system_ffmpeg_path = shutil.which('ffmpeg')
+        # Resolve ffprobe once too, so each probe execs directly w/o a $PATH search
+        self.system_ffprobe_path = shutil.which('ffprobe')
 
         if not self.system_ffmpeg_path:
             if not self.quiet:
@@ -100,7 +113,7 @@ class FfmpegChooser:
         
         # Test HEVC encoding with hardware acceleration
         test_cmd = [
-            'ffmpeg',
+            self.system_ffmpeg_path,
             '-y',
             '-init_hw_device', f'vaapi=va:{render_device}',
             '-filter_hw_device', 'va',
@@ -404,6 +417,8 @@ class FfmpegChooser:
             use_nice_ionice: Use nice/ionice for low priority (default: True)
             pre_input_opts: Options before -i (default: [])
             post_input_opts: Options after -i (default: [])
+            progress_pipe: fd number for key=value '-progress' output instead
+                           of the stats line, e.g. 1 for stdout (default: None)
         
         Returns:
             SimpleNamespace with all parameters
@@ -450,6 +465,9 @@ class FfmpegChooser:
             # Pre/post input opts
             pre_input_opts=[],
             post_input_opts=[],
+
+            # Progress reporting
+            progress_pipe=None,  # None = normal stats line on stderr
         )
         
         # Apply overrides
@@ -561,10 +579,14 @@ class FfmpegChooser:
         # FFmpeg arguments start here
         # (Docker image already has ffmpeg as entrypoint, don't add it again)
         if not self.use_docker:
-            cmd.append('ffmpeg')
+            cmd.append(self.system_ffmpeg_path or 'ffmpeg')
         
         cmd.append('-y')
-        
+
+        # Structured progress (key=value lines) in place of the stats line
+        if params.progress_pipe is not None:
+            cmd.extend(['-nostats', '-progress', f'pipe:{params.progress_pipe}'])
+
         # Pre-input options (e.g., -ss for seeking)
         if params.pre_input_opts:
             cmd.extend(params.pre_input_opts)
@@ -868,7 +890,7 @@ class FfmpegChooser:
             ])
             cmd.append(input_basename)
         else:
-            cmd.append('ffprobe')
+            cmd.append(self.system_ffprobe_path or 'ffprobe')
             cmd.append(input_file)
         
         # Add extra arguments
@@ -993,7 +1015,8 @@ def main():
     chooser = FfmpegChooser(
         force_pull=args.force_pull,
         image=args.image,
-        prefer_strategy=prefer_strategy
+        prefer_strategy=prefer_strategy,
+        detect_all=True
     )
 
     # Run tests
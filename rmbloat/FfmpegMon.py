@@ -6,7 +6,11 @@ import os
 import re
 import fcntl
 import subprocess
-from typing import Optional, Union
+from collections import deque
+from typing import Deque, Optional, Tuple, Union
+
+# Line breaks in FFmpeg output: \n for normal/progress lines, \r for stats updates
+LINE_SPLIT_RE = re.compile(b'[\r\n]')
 
 class FfmpegMon:
     """
@@ -19,53 +23,64 @@ class FfmpegMon:
     def __init__(self):
         self.process: Optional[subprocess.Popen] = None
         self.partial_line: bytes = b""
-        self.output_queue: list[str] = []  # <--- NEW: Queue for complete lines
+        self.partial_progress: bytes = b""  # partial '-progress' line (stdout)
+        # Queue for complete lines (str) and '-progress' (key, value) bytes pairs
+        self.output_queue: Deque[Union[str, Tuple[bytes, bytes]]] = deque()
         self.return_code: Optional[int] = None
         self.temp_file = None
 
-    def start(self, command_line: list[str], temp_file: Optional[str] = None) -> None:
+    def start(self, command_line: list[str], temp_file: Optional[str] = None,
+              cwd: Optional[str] = None, progress: bool = False) -> None:
         """
         Starts the FFmpeg subprocess.
 
         Args:
             command_line: The full FFmpeg command as a list of strings.
             temp_file: Optional path to the temporary output file (for cleanup on stop).
+            cwd: Optional working directory for the subprocess only.
+            progress: If True, FFmpeg writes '-progress' key=value lines to
+                      stdout (i.e., '-progress pipe:1'); they are read separately
+                      from stderr and queued as (key, value) bytes pairs.
         """
         self.temp_file = temp_file
         if self.process:
             raise RuntimeError("FfmpegMon is already monitoring a process.")
 
         try:
-            # Start the process, piping stderr for progress updates
+            # Start the process, piping stderr for messages (and stdout for progress)
             self.process = subprocess.Popen(
                 command_line,
-                stdout=subprocess.DEVNULL,  # Discard normal output
-                stderr=subprocess.PIPE,     # Capture progress messages
-                text=False,                  # Read output as text
-                bufsize=0
+                stdout=subprocess.PIPE if progress else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,     # Capture FFmpeg messages
+                text=False,                  # Read output as bytes
+                bufsize=0,
+                cwd=cwd
             )
 
-            # --- CRITICAL: Make stderr non-blocking ---
-            # Get the file descriptor number for the stderr pipe
-            fd = self.process.stderr.fileno()
-            # Get the current flags
-            fl = fcntl.fcntl(fd, fcntl.F_GETFL)
-            # Set the O_NONBLOCK flag
-            fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
+            # --- CRITICAL: Make the pipes non-blocking ---
+            for stream in (self.process.stderr, self.process.stdout):
+                if stream:
+                    # Get the file descriptor number for the pipe
+                    fd = stream.fileno()
+                    # Get the current flags
+                    fl = fcntl.fcntl(fd, fcntl.F_GETFL)
+                    # Set the O_NONBLOCK flag
+                    fcntl.fcntl(fd, fcntl.F_SETFL, fl | os.O_NONBLOCK)
 
         except Exception as e:
             # Handle common errors like 'ffmpeg' not found
             print(f"Error starting FFmpeg process: {e}")
             self.return_code = 127
 
-    def poll(self) -> Union[Optional[int], str]:
+    def poll(self) -> Union[Optional[int], str, Tuple[bytes, bytes]]:
         """
         Reads and processes data. Returns the next item from the internal queue
-        (string output) or the final return code (integer).
+        (string output, or a (key, value) '-progress' pair) or the final
+        return code (integer).
         """
         # --- Stage 0: Process Queue First & Status Check (remains unchanged) ---
         if self.output_queue:
-            return self.output_queue.pop(0)
+            return self.output_queue.popleft()
 
         if not self.process:
             return self.return_code
@@ -90,7 +105,7 @@ class FfmpegMon:
 
             # 2a. Split data by \n or \r. Note: re.split discards delimiters.
             # Use 'b' prefix for regex pattern since data is bytes
-            fragments = re.split(b'[\r\n]', data)
+            fragments = LINE_SPLIT_RE.split(data)
 
             # 2b. The last element is the new partial line (may be an empty fragment)
             self.partial_line = fragments[-1]
@@ -102,9 +117,22 @@ class FfmpegMon:
                     line_str = line_bytes.decode('utf-8', errors='ignore')
                     self.output_queue.append(line_str)
 
+        # 2d. The '-progress' lines (stdout) are always '\n' terminated 'key=value'
+        if self.process.stdout:
+            try:
+                chunk = self.process.stdout.read()
+            except (IOError, OSError):
+                chunk = b""
+            if chunk:
+                *lines, self.partial_progress = (self.partial_progress + chunk).split(b'\n')
+                self._queue_progress(lines)
+
         # --- Stage 3 & 4: Handle Termination and Final Check (remains largely unchanged) ---
         if process_status is not None:
-            # The process is done. Process any remaining data in partial_line.
+            # The process is done. Process any remaining data in the partial lines.
+            if self.partial_progress:
+                self._queue_progress([self.partial_progress])
+                self.partial_progress = b""
             if self.partial_line:
                 # Decode and add the final output/error line.
                 final_output = self.partial_line.decode('utf-8', errors='ignore')
@@ -114,7 +142,7 @@ class FfmpegMon:
             # If the queue now has items, return the first one.
             if self.output_queue:
                 self.return_code = process_status # Store code for *after* the queue is empty
-                return self.output_queue.pop(0)
+                return self.output_queue.popleft()
 
             # If the queue is empty, we return the final code.
             self.return_code = process_status
@@ -123,10 +151,21 @@ class FfmpegMon:
 
         # --- Stage 4: Final Check ---
         if self.output_queue:
-            return self.output_queue.pop(0)
+            return self.output_queue.popleft()
 
         return None
 
+    def _queue_progress(self, lines):
+        """
+        Queue complete '-progress' lines as (key, value) pairs, left as bytes:
+        they arrive several times a second, int()/float() accept bytes, and
+        only a few values are ever looked at
+        """
+        for line_bytes in lines:
+            key, sep, value = line_bytes.partition(b'=')
+            if sep:
+                self.output_queue.append((key, value))
+
     def _read_remaining(self):
         """
         Helper to read any final buffered output after termination.
@@ -155,11 +194,15 @@ class FfmpegMon:
                 self.process.wait(timeout=15) # Wait for it to die gracefully
             except Exception:
                 pass  # hope for the best
-        if self.temp_file and os.path.exists(self.temp_file):
-            os.unlink(self.temp_file)
+        if self.temp_file:
+            try:
+                os.unlink(self.temp_file)
+            except FileNotFoundError:
+                pass
         self.temp_file = None
         self.process = None
-        self.partial_line = ""
+        self.partial_line = b""
+        self.partial_progress = b""
         self.return_code = return_code
 
     def __del__(self):
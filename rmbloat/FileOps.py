@@ -117,9 +117,10 @@ def apply_timestamps(filepath, timestamps):
         return False
 
 
-def bulk_rename(old_file_name: str, new_file_name: str, trashes: set, dry_run: bool = False):
+def bulk_rename(old_file_name: str, new_file_name: str, trashes: set, dry_run: bool = False,
+                root: str = None, busy_paths: set = None):
     """
-    Renames files and directories in the current working directory (CWD).
+    Renames files and directories in the `root` directory (default: CWD).
 
     It finds all items whose non-extension part matches the non-extension part
     of `old_file_name`, and renames them using the non-extension part of
@@ -132,34 +133,43 @@ def bulk_rename(old_file_name: str, new_file_name: str, trashes: set, dry_run: b
                        the base name to rename to ('newbie').
         trashes: Set of filenames that are being trashed (skip these)
         dry_run: If True, don't actually rename, just report what would be done
+        root: Directory to search recursively (default: the CWD at entry);
+              it is made absolute so no rename depends on the CWD
+        busy_paths: Absolute paths in use by other running jobs; neither these
+                    nor their parent directories are renamed
 
     Returns:
         List of operation strings describing what was done
     """
     ops = []
     would = 'WOULD ' if dry_run else ''
+    root = os.path.abspath(root) if root else os.getcwd()
 
     old_base_name, _ = os.path.splitext(old_file_name)
     new_base_name, _ = os.path.splitext(new_file_name)
 
+    # the busy paths and their directories up to the root
+    in_use, root_prefix = set(), os.path.join(root, '')
+    for path in busy_paths or ():
+        while path.startswith(root_prefix) and path not in in_use:
+            in_use.add(path)
+            path = os.path.dirname(path)
+
     # Define the special suffix to look for (case-insensitive search)
     special_ext = ".REFERENCE.srt"
-    # 2. Use os.walk for recursive traversal starting from the current directory ('.')
-    for root, dirs, files in os.walk('.', topdown=False):
-
-        # Combine files and directories for unified processing.
-        items_to_check = files + dirs
-
-        for item_name in items_to_check:
-            # Skip if the item is a special directory reference
-            if item_name in ('.', '..'):
+    special_ext_lower, special_ext_len = special_ext.lower(), len(special_ext)
+    special_name_len = len(old_base_name) + special_ext_len
+    # 2. Bottom-up os.fwalk() from the root directory: children are renamed
+    #    before their parent directories, and each rename is relative to the
+    #    open descriptor of its directory (no path re-resolution per rename).
+    #    Symlinked directories are reported but not descended into.
+    for dirpath, dirnames, filenames, dir_fd in os.fwalk(root, topdown=False):
+        for item_name in filenames + dirnames:
+            # Every rule below needs the name to begin with old_base_name,
+            # so most entries are rejected here with one cheap test
+            if not item_name.startswith(old_base_name):
                 continue
 
-            full_old_path = os.path.join(root, item_name)
-            current_base, extension = os.path.splitext(item_name)
-            current_base2, extension2 = os.path.splitext(current_base)
-            extension2 = extension2 + extension
-
             new_item_name = None
 
             # --- Rule 1: Special Case - Full Name Match (item_name == old_base_name) ---
@@ -168,31 +178,48 @@ def bulk_rename(old_file_name: str, new_file_name: str, trashes: set, dry_run: b
 
             # --- Rule 2: Special Case - Reference SRT Suffix Match ---
             # Requires the item to end with ".reference.srt" AND the base part to match old_base_name
-            elif (item_name.lower().endswith(special_ext.lower())
-                  and item_name[:-len(special_ext)] == old_base_name):
+            # (given the startswith() test, the length pins the base part; only the
+            # suffix is lower-cased rather than the whole name)
+            elif (len(item_name) == special_name_len
+                  and item_name[-special_ext_len:].lower() == special_ext_lower):
                 new_item_name = new_base_name + special_ext
 
-            elif current_base2 == old_base_name:
-                new_item_name = new_base_name + extension2
-
-            # --- Rule 3: General Case - Base Name Match ---
-            # Applies if the non-extension part matches the intended old base name,
-            # and was not caught by the specific rules above.
-            elif current_base == old_base_name:
-                # General Case: New name is new_base_name + original extension
-                new_item_name = new_base_name + extension
-
-            # 4. If no matching rule was triggered, skip this one
-            if not new_item_name:
+            else:
+                # Only split off the extension(s) when the rules need them
+                # (a leading dot is not an extension, as with os.path.splitext)
+                dot = item_name.rfind('.')
+                current_base, extension = ((item_name[:dot], item_name[dot:])
+                                           if dot > 0 else (item_name, ''))
+                dot = current_base.rfind('.')
+                current_base2, extension2 = ((current_base[:dot], current_base[dot:] + extension)
+                                             if dot > 0 else (current_base, extension))
+
+                # --- Double Extension Match (e.g., 'name.en.srt') ---
+                if current_base2 == old_base_name:
+                    new_item_name = new_base_name + extension2
+
+                # --- Rule 3: General Case - Base Name Match ---
+                # Applies if the non-extension part matches the intended old base name,
+                # and was not caught by the specific rules above.
+                elif current_base == old_base_name:
+                    # General Case: New name is new_base_name + original extension
+                    new_item_name = new_base_name + extension
+
+            # 4. If no matching rule was triggered (or it is being trashed), skip this one
+            if not new_item_name or item_name in trashes:
                 continue
 
             # 5. Perform the rename operation
-            full_new_path = os.path.join(root, new_item_name)
+            full_old_path = os.path.join(dirpath, item_name)
+            full_new_path = os.path.join(dirpath, new_item_name)
+            if full_old_path in in_use:
+                ops.append(f"SKIP: rename {full_old_path!r} (in use by another job)")
+                continue
             try:
-                if os.path.basename(item_name) not in trashes:
-                    if not dry_run:
-                        os.rename(full_old_path, full_new_path)
-                    ops.append(f"{would}rename {full_old_path!r} {full_new_path!r}")
+                if not dry_run:
+                    os.rename(item_name, new_item_name,
+                              src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+                ops.append(f"{would}rename {full_old_path!r} {full_new_path!r}")
             except Exception as e:
                 # Handle potential errors (e.g., permission errors, file in use)
                 ops.append(f"ERR: rename '{full_old_path}' '{full_new_path}': {e}")
@@ -6,9 +6,7 @@ Job handling for video conversion - manages transcoding jobs and progress monito
 # pylint: disable=broad-exception-caught,invalid-name
 # pylint: disable=too-many-instance-attributes,no-else-return
 import os
-import re
 import time
-from datetime import timedelta
 from pathlib import Path
 import send2trash
 from .Models import Job
@@ -18,23 +16,6 @@ from . import FileOps
 class JobHandler:
     """Handles video transcoding job execution and monitoring"""
 
-    # Regex for parsing FFmpeg progress output
-    PROGRESS_RE = re.compile(
-        # 1. Frame Section (Required, Strict Numerical Capture)
-        # Looks for 'frame=', then captures the integer (G1).
-        r"\s*frame[=\s]+(\d+)\s+"
-
-        # 2. Time Section (Optional, Strict Numerical Capture)
-        # Looks for 'time=', then attempts to capture the precise HH:MM:SS.cs format (G2-G5).
-        r"(?:.*?time[=\s]+(\d{2}):(\d{2}):(\d{2})\.(\d{2}))?"
-
-        # 3. Speed Section (Optional, Strict Numerical Capture)
-        # Looks for 'speed=', then captures the float (G6).
-        r"(?:.*?speed[=\s]+(\d+\.\d+)x)?",
-
-        re.IGNORECASE
-    )
-
     sample_seconds = 30
 
     def __init__(self, opts, chooser, probe_cache, auto_mode_enabled=False):
@@ -51,9 +32,6 @@ class JobHandler:
         self.chooser = chooser
         self.probe_cache = probe_cache
 
-        # Progress tracking
-        self.progress_line_mono = 0
-
         # Auto mode tracking
         self.auto_mode_enabled = auto_mode_enabled
         self.auto_mode_start_time = time.monotonic() if auto_mode_enabled else None
@@ -109,26 +87,61 @@ class JobHandler:
         ]
         return color_opts
 
+    def get_subtitle_path(self, vid):
+        """Return the external subtitle file to merge into vid (or None)"""
+        if self.opts.merge_subtitles:
+            subtitle_path = Path(vid.filepath).with_suffix('.en.srt')
+            if subtitle_path.exists():
+                return str(subtitle_path)
+        return None
+
+    @staticmethod
+    def get_output_name(vid, subtitle_path):
+        """Return the final name of the converted vid"""
+        standard_name = vid.standard_name
+        if subtitle_path and not standard_name.endswith('.sb.mkv'):
+            standard_name = str(Path(standard_name).with_suffix('.sb.mkv'))
+        return standard_name
+
+    def get_temp_file(self, vid):
+        """Return the path FFmpeg writes while converting vid
+
+        Distinct vids can map to the same standard name (e.g., X.720p.x264.mkv
+        and X.720p.xvid.avi), so callers running several jobs must not start
+        one whose temp file is already in use.
+        """
+        output_name = self.get_output_name(vid, self.get_subtitle_path(vid))
+        prefix = f'/heap/samples/SAMPLE.{self.opts.quality}' if self.opts.sample else 'TEMP'
+        return os.path.join(vid.filedir, f"{prefix}.{output_name}")
+
+    def get_busy_paths(self, jobs):
+        """Return the paths the given (running) jobs read or write"""
+        busy_paths = set()
+        for job in jobs:
+            busy_paths.update((job.vid.filepath, job.temp_file))
+            subtitle_path = self.get_subtitle_path(job.vid)
+            if subtitle_path:
+                busy_paths.add(subtitle_path)
+        return busy_paths
+
     def start_transcode_job(self, vid, bash_quote_func):
         """Start a transcoding job using FfmpegChooser."""
-        os.chdir(os.path.dirname(vid.filepath))
-        basename = os.path.basename(vid.filepath)
+        # NOTE: work with full paths (FFmpeg gets cwd=filedir) rather than
+        # os.chdir() so the process-wide working directory is never changed
+        filedir, basename = vid.filedir, vid.filebase
         probe = vid.probe0
 
-        merged_external_subtitle = None
-        if self.opts.merge_subtitles:
-            subtitle_path = Path(vid.filepath).with_suffix('.en.srt')
-            if subtitle_path.exists():
-                merged_external_subtitle = str(subtitle_path)
-                vid.standard_name = str(Path(vid.standard_name).with_suffix('.sb.mkv'))
+        merged_external_subtitle = self.get_subtitle_path(vid)
+        vid.standard_name = self.get_output_name(vid, merged_external_subtitle)
 
         # Determine output file paths
-        prefix = f'/heap/samples/SAMPLE.{self.opts.quality}' if self.opts.sample else 'TEMP'
-        temp_file = f"{prefix}.{vid.standard_name}"
-        orig_backup_file = f"ORIG.{basename}"
+        temp_file = self.get_temp_file(vid)
+        orig_backup_file = os.path.join(filedir, f"ORIG.{basename}")
 
-        if os.path.exists(temp_file):
+        try:
             os.unlink(temp_file)
+        except FileNotFoundError:
+            pass
 
         # Calculate duration
         duration_secs = probe.duration
@@ -140,7 +153,7 @@ class JobHandler:
 
         # Create namespace with defaults
         params = self.chooser.make_namespace(
-            input_file=job.input_file,
+            input_file=vid.filepath,
             output_file=job.temp_file
         )
 
@@ -153,6 +166,10 @@ class JobHandler:
         # Set thread count
         params.thread_count = self.opts.thread_cnt
 
+        # Have FFmpeg report progress as key=value lines on stdout, apart
+        # from its messages on stderr
+        params.progress_pipe = 1
+
         # Sampling options
         if self.opts.sample:
             params.sample_mode = True
@@ -204,8 +221,9 @@ class JobHandler:
 
         # Start the job
         if not self.opts.dry_run:
-            job.ffsubproc.start(ffmpeg_cmd, temp_file=job.temp_file)
-            self.progress_line_mono = time.monotonic()
+            job.ffsubproc.start(ffmpeg_cmd, temp_file=job.temp_file, cwd=filedir,
+                                progress=True)
+            job.progress_line_mono = time.monotonic()
         return job
 
     def monitor_transcode_progress(self, job):
@@ -232,7 +250,7 @@ class JobHandler:
 
         if self.opts.dry_run or return_code == 0:
             print(f"\r{job.input_file}: Transcoding FINISHED"
-                  f" (Elapsed: {timedelta(seconds=int(time.monotonic() - job.start_mono))})")
+                  f" (Elapsed: {job.hms(time.monotonic() - job.start_mono)})")
             return True  # Success
         else:
             # Print a final error message
@@ -268,11 +286,11 @@ class JobHandler:
 
             # --- Format the output line using the estimated values ---
             percent_complete = (frame_number / total_frames) * 100
-            remaining_time_formatted = job.trim0(str(timedelta(seconds=int(remaining_seconds))))
-            elapsed_time_formatted = job.trim0(str(timedelta(seconds=elapsed_time_sec)))
+            remaining_time_formatted = job.hms(remaining_seconds)
+            elapsed_time_formatted = job.hms(elapsed_time_sec)
             if job.duration_secs > 0:
                 at_seconds = (frame_number / total_frames) * job.duration_secs
-                at_seconds_formatted = job.trim0(str(timedelta(seconds=int(at_seconds))))
+                at_seconds_formatted = job.hms(at_seconds)
                 at_formatted = f'At ~{at_seconds_formatted}/{job.total_duration_formatted}'
             else:
                 at_formatted = f"Frame {frame_number}/{total_frames}"
@@ -293,41 +311,46 @@ class JobHandler:
             got = job.ffsubproc.poll()
             now_mono = time.monotonic()
             # print(f'\r{delta=} {got=}')
-            if now_mono - self.progress_line_mono > secs_max:
+            # Only time out once the pipes are drained: with several jobs, the
+            # main loop may have been busy elsewhere (e.g., finishing another
+            # job) while this one's output queued up
+            if got is None and now_mono - job.progress_line_mono > secs_max:
                 got = 254
                 vid.texts.append('PROGRESS TIMEOUT')
                 job.ffsubproc.stop(return_code=got)
-                self.progress_line_mono = time.monotonic() + 1000000000
+                job.progress_line_mono = now_mono + 1000000000
                 continue
 
             if isinstance(got, str):
-                line = got
-                match = self.PROGRESS_RE.search(line)
-                if not match:
-                    vid.texts.append(line)
-                    continue
+                # Regular FFmpeg output on stderr (errors, warnings)
+                vid.texts.append(got)
+                continue
+
+            if isinstance(got, tuple):
+                # With '-progress pipe:1', FFmpeg reports in 'key=value' lines,
+                # each block ending with 'progress=continue' (or 'progress=end')
+                key, value = got  # (bytes)
+                job.ff_progress[key] = value
+                if key != b'progress':
+                    continue  # block not complete yet
 
-                if now_mono - self.progress_line_mono < 3:
+                if now_mono - job.progress_line_mono < 3:
                     continue  # don't update progress crazy often
-                self.progress_line_mono = time.monotonic()
+                job.progress_line_mono = now_mono
 
-                # 1. Extract values from the regex match
-                groups = match.groups()
+                # 1. Extract values from the completed progress block
+                state = job.ff_progress
                 try:
-
-                    # The first two parts (H and M) are integers. The third part (S.ms) is the float.
-                    h = int(groups[1])
-                    m = int(groups[2])
-                    s = int(groups[3])
-                    ms = int(groups[4])
-                    time_encoded_seconds = h * 3600 + m * 60 + s + ms / 100
-                    time_encoded_seconds = round(int(time_encoded_seconds))
-                    speed = float(match.group(6))
+                    # out_time_us is the encoded position in microseconds
+                    # (older FFmpeg only has out_time_ms, which is also in us)
+                    out_time_us = state.get(b'out_time_us', state.get(b'out_time_ms'))
+                    time_encoded_seconds = max(0, int(out_time_us)) // 1000000
+                    speed = float(state[b'speed'].rstrip(b'x'))
                 except Exception:
-                    # return f"Frame {groups[0]}:  MAKING PROGRESS..."
-                    return rough_progress(groups[0])
+                    # e.g., 'N/A' values early in the encode
+                    return rough_progress(state.get(b'frame', b'0'))
 
-                elapsed_time_sec = int(time.monotonic() - job.start_mono)
+                elapsed_time_sec = int(now_mono - job.start_mono)
 
                 # 2. Calculate remaining time
                 if job.duration_secs > 0:
@@ -336,7 +359,7 @@ class JobHandler:
                         # Time Remaining calculation (rough estimate)
                         # Remaining Time = (Total Time - Encoded Time) / Speed
                         remaining_seconds = (job.duration_secs - time_encoded_seconds) / speed
-                        remaining_time_formatted = job.trim0(str(timedelta(seconds=int(remaining_seconds))))
+                        remaining_time_formatted = job.hms(remaining_seconds)
                     else:
                         remaining_time_formatted = "N/A"
                 else:
@@ -345,10 +368,10 @@ class JobHandler:
 
                 # 3. Format the output line
                 # \r at the start makes the console cursor go back to the beginning of the line
-                cur_time_formatted = job.trim0(str(timedelta(seconds=time_encoded_seconds)))
+                cur_time_formatted = job.hms(time_encoded_seconds)
                 progress_line = (
                     f"{percent_complete:.1f}% | "
-                    f"{job.trim0(str(timedelta(seconds=elapsed_time_sec)))} | "
+                    f"{job.hms(elapsed_time_sec)} | "
                     f"-{remaining_time_formatted} | "
                     f"{speed:.1f}x | "
                     f"At {cur_time_formatted}/{job.total_duration_formatted}"
@@ -360,10 +383,13 @@ class JobHandler:
             else:
                 return got
 
-    def finish_transcode_job(self, success, job, is_allowed_codec_func):
+    def finish_transcode_job(self, success, job, is_allowed_codec_func, busy_paths=None):
         """
         Complete a transcoding job and handle file operations.
 
+        busy_paths are those of other running jobs (see get_busy_paths());
+        the renames of the companion files leave them alone.
+
         Returns:
             probe: The probe of the transcoded file (or None if failed/dry_run)
         """
@@ -458,22 +484,36 @@ class JobHandler:
         if success and not self.opts.sample:
             would = 'WOULD ' if dry_run else ''
             trashes = set()
-            basename = os.path.basename(vid.filepath)
+            filedir, basename = vid.filedir, vid.filebase
+            new_filepath = os.path.join(filedir, vid.standard_name)
 
             # Preserve timestamps from original file
             timestamps = None
             if not dry_run:
-                timestamps = FileOps.preserve_timestamps(basename)
+                timestamps = FileOps.preserve_timestamps(vid.filepath)
 
             try:
                 # Rename original to backup
                 if not dry_run and self.opts.keep_backup:
-                    os.rename(basename, job.orig_backup_file)
+                    linked = False
+                    if new_filepath == vid.filepath:
+                        # The converted file takes the original's name: back up
+                        # with a hard link so the name is never missing; the
+                        # os.replace() below then swaps in the new file atomically
+                        try:
+                            os.link(vid.filepath, job.orig_backup_file)
+                            linked = True
+                        except OSError:
+                            pass  # e.g., no hard links on this filesystem
+                    if not linked:
+                        os.rename(vid.filepath, job.orig_backup_file)
                 if self.opts.keep_backup:
                     vid.ops.append(
-                        f"{would} rename {basename!r} {job.orig_backup_file!r}")
+                        f"{would} rename {basename!r} {os.path.basename(job.orig_backup_file)!r}")
                 if not dry_run and not self.opts.keep_backup:
-                    send2trash.send2trash(basename)
+                    # trash before anything else changes so that a failure
+                    # leaves the original in place (and the swap undone)
+                    send2trash.send2trash(vid.filepath)
                 if dry_run and not self.opts.keep_backup:
                     trashes.add(basename)
                 if not self.opts.keep_backup:
@@ -481,23 +521,29 @@ class JobHandler:
 
                 # Rename temporary file to the original filename
                 if not dry_run:
-                    os.rename(job.temp_file, vid.standard_name)
+                    os.replace(job.temp_file, new_filepath)
+                    # the converted file was just probed; keep that under its
+                    # final name so it is not probed again on the next run
+                    self.probe_cache.rename(job.temp_file, new_filepath)
                 vid.ops.append(
-                    f"{would}rename {job.temp_file!r} {vid.standard_name!r}")
+                    f"{would}rename {os.path.basename(job.temp_file)!r} {vid.standard_name!r}")
 
                 if vid.do_rename:
                     # Call FileOps.bulk_rename directly
-                    vid.ops += FileOps.bulk_rename(basename, vid.standard_name, trashes, dry_run)
+                    vid.ops += FileOps.bulk_rename(basename, vid.standard_name, trashes,
+                                                   dry_run, root=filedir,
+                                                   busy_paths=busy_paths)
 
                 if not dry_run:
                     # Apply preserved timestamps to the new file
-                    FileOps.apply_timestamps(vid.standard_name, timestamps)
+                    FileOps.apply_timestamps(new_filepath, timestamps)
 
                     # Set basename1 for the successfully converted file
                     vid.basename1 = vid.standard_name
                     # probe will be returned to Converter for apply_probe
 
             except OSError as e:
+                vid.ops.append(f"ERR: swap {basename!r}: {e}")
                 print(f"ERROR during swap of {vid.filepath}: {e}")
                 print(f"Original: {job.orig_backup_file}, New: {job.temp_file}. Manual cleanup required.")
         elif success and self.opts.sample:
@@ -506,9 +552,11 @@ class JobHandler:
             # probe will be returned to Converter for apply_probe
         elif not success:
             # Transcoding failed, delete the temporary file
-            if os.path.exists(job.temp_file):
+            try:
                 os.remove(job.temp_file)
                 print(f"FFmpeg failed. Deleted incomplete {job.temp_file}.")
+            except FileNotFoundError:
+                pass
             self.probe_cache.set_anomaly(vid.filepath, 'Err')
 
         # Return probe for Converter to apply
@@ -5,10 +5,8 @@ Data models for rmbloat video conversion
 import os
 import sys
 import time
-import math
 from dataclasses import dataclass, field
 from typing import Optional
-from datetime import timedelta
 from .ProbeCache import Probe
 from .FfmpegMon import FfmpegMon
 # pylint: disable=import-outside-toplevel,too-many-instance-attributes
@@ -31,6 +29,7 @@ class Vid:
     video_file: str = field(init=False)
     filepath: str = field(init=False)
     filebase: str = field(init=False)
+    filedir: str = field(init=False)
     standard_name: str = field(init=False)
     do_rename: bool = field(init=False)
 
@@ -61,7 +60,8 @@ class Vid:
         """ Custom initialization logic after dataclass __init__ """
         self.video_file = ppp.video_file
         self.filepath = ppp.video_file
-        self.filebase = os.path.basename(ppp.video_file)
+        # split once here; the path is consulted on every redraw
+        self.filedir, self.filebase = os.path.split(ppp.video_file)
         self.standard_name = ppp.standard_name
         self.do_rename = ppp.do_rename
 
@@ -80,28 +80,30 @@ class Job:
         self.start_mono = time.monotonic()
 
         self.progress = 'DRY-RUN' if dry_run else 'Started'
-        self.input_file = os.path.basename(vid.filepath)
+        self.input_file = vid.filebase
         self.orig_backup_file = orig_backup_file
         self.temp_file = temp_file
         self.duration_secs = duration_secs
-        self.total_duration_formatted = self.trim0(
-                        str(timedelta(seconds=int(duration_secs))))
+        self.total_duration_formatted = self.hms(duration_secs)
 
         self.ffsubproc = FfmpegMon()
+        self.ff_progress = {}  # latest FFmpeg '-progress' key=value pairs (bytes)
+        self.progress_line_mono = self.start_mono  # last progress update
         self.return_code = None
 
     @staticmethod
-    def trim0(string):
-        """ Remove leading '0:' from time string """
-        if string.startswith('0:'):
-            return string[2:]
-        return string
+    def hms(secs):
+        """ Format (non-negative) seconds as H:MM:SS, or MM:SS under an hour """
+        minutes, secs = divmod(max(0, int(secs)), 60)
+        if minutes < 60:
+            return f"{minutes:02d}:{secs:02d}"
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{secs:02d}"
 
     @staticmethod
     def duration_spec(secs):
         """ Convert seconds to HH:MM:SS format """
         secs = int(round(secs))
-        hours = math.floor(secs / 3600)
-        minutes = math.floor((secs % 3600) / 60)
-        secs = secs % 60
+        hours, secs = divmod(secs, 3600)
+        minutes, secs = divmod(secs, 60)
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
@@ -11,12 +11,25 @@ import atexit
 from dataclasses import dataclass, field, asdict
 from typing import Optional, Dict, Any, Union, List
 from threading import Lock
-from concurrent.futures import ThreadPoolExecutor # <-- NEW IMPORT
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
 # pylint: disable=invalid-name,broad-exception-caught,line-too-long
 # pylint: disable=too-many-return-statements,too-many-statements
 
 _dataclass_kwargs = {'slots': True} if sys.version_info >= (3, 10) else {}
 
+# The only ffprobe fields we use; asking for just these (rather than
+# -show_format -show_streams) spares ffprobe formatting, and us parsing,
+# the tags, dispositions, etc. of every stream
+PROBE_ENTRIES = ('stream=codec_type,codec_name,width,height,'
+                 'color_space,color_primaries,color_transfer,r_frame_rate,avg_frame_rate'
+                 ':format=bit_rate,duration')
+
+# A counted conversion-error anomaly (Er1 ... Er9)
+ERR_ANOMALY_RE = re.compile(r'^\bEr(\d)\b', re.IGNORECASE)
+
+# Subtitle codecs that survive conversion (text-based); others are dropped
+SAFE_SUBTITLE_CODECS = frozenset({'subrip', 'ass', 'ssa', 'mov_text', 'webvtt', 'text'})
+
 @dataclass(**_dataclass_kwargs)
 class Probe:
     """Video metadata probe results"""
@@ -117,7 +130,9 @@ class ProbeCache:
             return ",".join(parts)
 
         # --- END COMPACT COLOR PARAMETER EXTRACTION ---
-        if not os.path.exists(file_path):
+        # One stat both for existence and for the size recorded with the probe
+        size_info = self._get_file_size_info(file_path)
+        if size_info is None:
             print(f"Error: File not found at '{file_path}'")
             return None
 
@@ -127,31 +142,45 @@ class ProbeCache:
                 file_path,
                 '-v', 'error',
                 '-print_format', 'json',
-                '-show_format',
-                '-show_streams'
+                '-show_entries', PROBE_ENTRIES
             )
         else:
             command = [
                 'ffprobe', '-v', 'error', '-print_format', 'json',
-                '-show_format', '-show_streams', file_path
+                '-show_entries', PROBE_ENTRIES, file_path
             ]
 
         try:
             # Added timeout and improved error handling for subprocess
+            # (output is left as bytes; json.loads() decodes the UTF-8 itself)
             result = subprocess.run(
                 command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
                 check=True,
                 timeout=30 # Add a timeout to prevent hanging
             )
 
             metadata = json.loads(result.stdout)
 
-            video_stream = next((s for s in metadata.get('streams', []) if s.get('codec_type') == 'video'), None)
-
-            if not video_stream or not metadata.get("format"):
+            # One pass over the streams for the first video stream and for unsafe
+            # subtitle streams (bitmap codecs that cause conversion failures).
+            # Safe text-based codecs: subrip, ass, ssa, mov_text, webvtt, text
+            # Everything else (dvd_subtitle, hdmv_pgs_subtitle, etc.) should be dropped;
+            # their indices are relative to the subtitle streams
+            video_stream, drop_indices, sub_idx = None, [], 0
+            for stream in metadata.get('streams', []):
+                codec_type = stream.get('codec_type')
+                if codec_type == 'video':
+                    if video_stream is None:
+                        video_stream = stream
+                elif codec_type == 'subtitle':
+                    codec = stream.get('codec_name', '')
+                    if codec and codec not in SAFE_SUBTITLE_CODECS:
+                        drop_indices.append(sub_idx)
+                    sub_idx += 1
+
+            if not video_stream or metadata.get("format") is None:
                 print(f"Error: ffprobe output missing critical stream/format data for '{file_path}'.")
                 return None
 
@@ -160,25 +189,12 @@ class ProbeCache:
                 height=int(video_stream.get('height', 0)),
                 codec=video_stream.get('codec_name', '---'),
                 color_spt=get_color_spt(),
-                bitrate=int(int(metadata["format"].get('bit_rate', '0'))/1000),
+                bitrate=int(metadata["format"].get('bit_rate', '0')) // 1000,
                 duration=float(metadata["format"].get('duration', 0.0)),
             )
 
-            # Detect unsafe subtitle streams (bitmap codecs that cause conversion failures)
-            # Safe text-based codecs: subrip, ass, ssa, mov_text, webvtt, text
-            # Everything else (dvd_subtitle, hdmv_pgs_subtitle, etc.) should be dropped
-            safe_subtitle_codecs = {'subrip', 'ass', 'ssa', 'mov_text', 'webvtt', 'text'}
-            subtitle_streams = [s for s in metadata.get('streams', []) if s.get('codec_type') == 'subtitle']
-
-            if subtitle_streams:
-                drop_indices = []
-                for idx, sub_stream in enumerate(subtitle_streams):
-                    codec = sub_stream.get('codec_name', '')
-                    if codec and codec not in safe_subtitle_codecs:
-                        drop_indices.append(idx)
-
-                if drop_indices:
-                    meta.customs = {'drop_subs': drop_indices}
+            if drop_indices:
+                meta.customs = {'drop_subs': drop_indices}
 
             # 1. Get the Raw Frame Rate String (r_frame_rate preferred)
             fps_str = video_stream.get('r_frame_rate') or video_stream.get('avg_frame_rate', '0/0')
@@ -195,10 +211,6 @@ class ProbeCache:
                 # Handle cases where fps_str is non-standard
                 pass
 
-            size_info = self._get_file_size_info(file_path)
-            if size_info is None:
-                raise IOError("Failed to get file size after probe.")
-
             meta.size_bytes = size_info['size_bytes']
             return meta
 
@@ -338,8 +350,8 @@ class ProbeCache:
             return None
 
         if filepath in self.cache_data:
-            fields = set(self.cache_data[filepath].keys())
-            if fields != self.disk_fields:
+            # (a keys view compares to a set directly; no set is built per lookup)
+            if self.cache_data[filepath].keys() != self.disk_fields:
                 del self.cache_data[filepath]
                 self._dirty_count += 1
                 return None
@@ -389,6 +401,16 @@ class ProbeCache:
 
         return meta
 
+    def rename(self, old_path: str, new_path: str):
+        """
+        Moves the cached entry of a renamed file to its new path (if cached),
+        so the file is not probed again under its new name.
+        """
+        entry = self.cache_data.pop(old_path, None)
+        if entry is not None:
+            self.cache_data[new_path] = entry
+            self._dirty_count += 1
+
     def set_anomaly(self, filepath: str, anomaly: Optional[str]) -> Optional[Probe]:
         """
         Sets the anomaly field to the given value and, if updated,
@@ -402,7 +424,7 @@ class ProbeCache:
                 if not meta.anomaly:
                     anomaly = 'Er1'
                 else:
-                    mat = re.match(r'^\bEr(\d)\b', meta.anomaly, re.IGNORECASE)
+                    mat = ERR_ANOMALY_RE.match(meta.anomaly)
                     if mat:
                         num = int(mat.group(1))
                         if num <= 8:
@@ -418,10 +440,13 @@ class ProbeCache:
                     self.store()
         return meta
         
-    def batch_get_or_probe(self, filepaths: List[str], max_workers: int = 8) -> Dict[str, Optional[Probe]]:
+    def batch_get_or_probe(self, filepaths: List[str], max_workers: Optional[int] = None) -> Dict[str, Optional[Probe]]:
         """
         Batch process a list of file paths. Checks cache first, then runs ffprobe
         concurrently for all cache misses. Includes graceful handling for KeyboardInterrupt (Ctrl-C).
+
+        max_workers defaults to 2 threads per CPU (capped at 8); each thread
+        mostly waits on its ffprobe subprocess.
         """
         exit_please = False
         results: Dict[str, Optional[Probe]] = {}
@@ -439,6 +464,11 @@ class ProbeCache:
         if not probe_needed_paths:
             return results
         total_files, probe_cnt = len(probe_needed_paths), 0
+        if max_workers is None:
+            max_workers = min(8, (os.cpu_count() or 1) * 2)
+        max_workers = min(max_workers, total_files)
+        # The '\r' status line is only useful on a terminal; skip it when redirected
+        show_progress = sys.stderr.isatty()
 
         print(f"Starting concurrent ffprobe for {len(probe_needed_paths)} files using {max_workers} threads...")
 
@@ -454,8 +484,9 @@ class ProbeCache:
             future_to_path.update({executor.submit(probe_wrapper, path): path for path in probe_needed_paths})
 
             try:
-                # Iterate over the completed futures (as they complete)
-                for future in future_to_path:
+                # Iterate over the completed futures (as they complete, so one
+                # slow probe does not hold up recording the others)
+                for future in as_completed(future_to_path):
                     filepath = future_to_path[future]
                     
                     try:
@@ -473,9 +504,10 @@ class ProbeCache:
                             if self._dirty_count >= 100:
                                 self.store()
                                 # Overwrite status line
-                                percent = round(100 * probe_cnt / total_files, 1)
-                                sys.stderr.write(f"probing: {percent}% {probe_cnt} of {total_files}\r")
-                                sys.stderr.flush()
+                                if show_progress:
+                                    percent = round(100 * probe_cnt / total_files, 1)
+                                    sys.stderr.write(f"probing: {percent}% {probe_cnt} of {total_files}\r")
+                                    sys.stderr.flush()
 
                     except KeyboardInterrupt:
                         # If an interrupt hits during a result fetch, stop all work.
@@ -531,8 +563,10 @@ class ProbeCache:
 
         # Print a final newline character to clean the console after completion
         self.store()
-        if total_files > 0:
+        if total_files > 0 and show_progress:
             sys.stderr.write("\n")
             sys.stderr.flush()
 
-        return results
\ No newline at end of file
+        # back in input order (probes complete in any order), so that the
+        # list of videos, and ties in its sorting, are the same on every run
+        return {path: results[path] for path in filepaths if path in results}
\ No newline at end of file
@@ -44,6 +44,7 @@ import re
 import time
 import json
 import curses
+import functools
 from dataclasses import asdict
 from types import SimpleNamespace
 from console_window import ConsoleWindow, OptionSpinner
@@ -82,6 +83,9 @@ class Converter:
     TARGET_HEIGHT = 1080
     TARGET_CODECS = ['h265', 'hevc']
     MAX_BITRATE_KBPS = 2100 # about 15MB/min (or 600MB for 40m)
+    CODEC_NAME_RE = re.compile(r'^[a-z]\w*$', re.IGNORECASE)
+    # the codecs allowed by each --allowed-codecs choice (None means all)
+    ALLOWED_CODECS = {'x265': ('hevc',), 'x26*': ('hevc', 'h264'), 'all': None}
 
     # Constants moved to ConvertUtils.py
     VIDEO_EXTENSIONS = ConvertUtils.VIDEO_EXTENSIONS
@@ -99,18 +103,17 @@ class Converter:
         self.vids = []
         self.todo_vids = []
         self.visible_vids = []
-        self.original_cwd = os.getcwd()
         self.ff_pre_i_opts = []
         self.ff_post_i_opts = []
         self.ff_thread_opts = []
         self.state = 'probe' # 'select', 'convert'
-        self.job = None
+        self.jobs = [] # running conversions (up to opts.jobs at once)
         self.prev_time_encoded_secs = -1
         # Be quiet if user has already selected a specific strategy
         quiet_chooser = bool(opts.prefer_strategy != 'auto')
         self.chooser = FfmpegChooser(force_pull=False, prefer_strategy=opts.prefer_strategy, quiet=quiet_chooser)
+        # ProbeCache loads (and purges stale entries) on construction
         self.probe_cache = ProbeCache(cache_dir_name=cache_dir, chooser=self.chooser)
-        self.probe_cache.load()
         self.probe_cache.store()
         self.start_job_mono = 0
         self.cpu = CpuStatus()
@@ -143,24 +146,31 @@ class Converter:
             parts.append('KeepB')
         if self.opts.merge_subtitles:
             parts.append('MrgSrt')
+        if self.opts.jobs > 1:
+            parts.append(f'Jobs={self.opts.jobs}')
         if self.auto_mode_enabled:
             parts.append(f'Auto={self.opts.auto_hr}hr')
         return ' -- ' + ' '.join(parts)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def codec_allowed(allowed_codecs, codec):
+        """ Return whether the codec is 'allowed' by the --allowed-codecs choice;
+            a pure function of a few distinct values, so the answers are cached """
+        # cheapest tests first: most codecs are settled by the allowed list
+        # (an unrecognized choice, e.g. from a stale ini file, allows no codec)
+        allowed = Converter.ALLOWED_CODECS.get(allowed_codecs, ())
+        if allowed is None or codec in allowed:
+            return True
+        # if not a codec name (e.g., "---"), then it is OK
+        # in the sense we will not choose it as an exception
+        return not Converter.CODEC_NAME_RE.match(codec)
+
     def is_allowed_codec(self, probe):
         """ Return whether the codec is 'allowed' """
         if not probe:
             return True
-        if not re.match(r'^[a-z]\w*$', probe.codec, re.IGNORECASE):
-            # if not a codec name (e.g., "---"), then it is OK
-            # in the sense we will not choose it as an exception
-            return True
-        codec_ok = bool(self.opts.allowed_codecs == 'all')
-        if self.opts.allowed_codecs == 'x265':
-            codec_ok = bool(probe.codec in ('hevc',))
-        if self.opts.allowed_codecs == 'x26*':
-            codec_ok = bool(probe.codec in ('hevc','h264'))
-        return codec_ok
+        return self.codec_allowed(self.opts.allowed_codecs, probe.codec)
 
     def apply_probe(self, vid, probe):
         """ TBD """
@@ -177,9 +187,6 @@ class Converter:
         vid.res_ok = bool(vid.height is not None and vid.height <= self.TARGET_HEIGHT)
         vid.bloat_ok = bool(vid.bloat < self.opts.bloat_thresh)
         vid.all_ok = bool(vid.res_ok and vid.bloat_ok and vid.codec_ok)
-
-        # vid.summary = (f'  {vid.width}x{vid.height}' +
-        #               f' {vid.codec} {vid.bloat}b {vid.gb}G')
         return probe
 
     def append_vid(self, ppp):
@@ -233,7 +240,11 @@ class Converter:
 
     def finish_transcode_job(self, success, job):
         """Delegate to JobHandler and apply probe if returned"""
-        probe = self.job_handler.finish_transcode_job(success, job, self.is_allowed_codec)
+        # the other jobs may be converting files in the same directories
+        busy_paths = self.job_handler.get_busy_paths(
+            other for other in self.jobs if other is not job)
+        probe = self.job_handler.finish_transcode_job(
+            success, job, self.is_allowed_codec, busy_paths)
         # Apply probe if one was returned
         if probe:
             job.vid.probe1 = self.apply_probe(job.vid, probe)
@@ -308,7 +319,7 @@ class Converter:
 #       probe_count = 0
 #       update_interval = 10  # Update the line every 10 probes
 
-        if total_files > 0:
+        if total_files > 0 and sys.stderr.isatty():
             # Print the initial line to start the progress bar
             sys.stderr.write(f"probing: 0% 0 of {total_files}\r")
             sys.stderr.flush()
@@ -327,7 +338,7 @@ class Converter:
         Returns:
             str or None: Status string if should be excluded ('DUN', 'OK'), None otherwise
         """
-        base = os.path.basename(vid.filepath).lower()
+        base = vid.filebase.lower()
 
         # Already re-encoded files get "DUN" (done) status
         if base.endswith('.recode.mkv'):
@@ -337,7 +348,8 @@ class Converter:
         if vid.doit in ('OK', '---'):
             return 'OK'
 
-        # Note: SAMPLE. and TEST. files are now excluded at is_valid_video_file() level
+        # Note: TEMP., ORIG. and SAMPLE. files are excluded at the is_valid_video_file()
+        # level, so the list (and its handlers) never need to test for them
 
         return None
 
@@ -383,6 +395,8 @@ class Converter:
 
     def do_window_mode(self):
         """ TBD """
+        line_cache = {}  # id(vid) -> (vid, inputs, line); reused until the inputs change
+
         def make_lines(doit_skips=None):
             nonlocal self
             lines, self.visible_vids, short_list = [], [], []
@@ -396,29 +410,41 @@ class Converter:
                 short_list.append(vid)
                 co_wid = max(co_wid, len(vid.codec))
 
+            mangle, directory = self.spins.mangle, self.spins.directory
+            search_re = None  # compiled once per redraw, not once per line
+            if self.spins.search:
+                pattern = self.spins.search
+                if mangle:
+                    pattern = Mangler.mangle(pattern)
+                search_re = re.compile(pattern, re.IGNORECASE)
             for vid in short_list:
-                basename = vid.basename1 if vid.basename1 else os.path.basename(vid.filepath)
-                dirname = os.path.dirname(vid.filepath)
-                if self.spins.mangle:
-                    basename = Mangler.mangle_title(basename)
-                    dirname = Mangler.mangle(dirname)
-                res = f'{vid.height}p'
-                ht_over = ' ' if vid.res_ok else '^' # '■'
-                br_over = ' ' if vid.bloat_ok else '^' # '■'
-                co_over = ' ' if vid.codec_ok else '^'
-                mins = int(round(vid.duration / 60))
-                line = f'{vid.doit:>3} {vid.net} {vid.bloat:5}{br_over} {res:>5}{ht_over}'
-                line += f' {vid.codec:>{co_wid}}{co_over} {mins:>4} {1024*vid.gb:>6.0f}'
-                line += f'   {basename}'
-                if self.spins.directory:
-                    line += f' ---> {dirname}'
-                if self.spins.search:
-                    pattern = self.spins.search
-                    if self.spins.mangle:
-                        pattern = Mangler.mangle(pattern)
-                    match = re.search(pattern, line, re.IGNORECASE)
-                    if not match:
-                        continue
+                # most lines are unchanged between redraws; only re-format
+                # (and re-mangle) those whose displayed values changed
+                inputs = (vid.doit, vid.net, vid.bloat, vid.bloat_ok, vid.height,
+                          vid.res_ok, vid.codec, vid.codec_ok, vid.duration, vid.gb,
+                          vid.basename1, co_wid, mangle, directory)
+                cached = line_cache.get(id(vid))
+                if cached and cached[0] is vid and cached[1] == inputs:
+                    line = cached[2]
+                else:
+                    basename = vid.basename1 if vid.basename1 else vid.filebase
+                    dirname = vid.filedir
+                    if mangle:
+                        basename = Mangler.mangle_title(basename)
+                        dirname = Mangler.mangle(dirname)
+                    res = f'{vid.height}p'
+                    ht_over = ' ' if vid.res_ok else '^' # '■'
+                    br_over = ' ' if vid.bloat_ok else '^' # '■'
+                    co_over = ' ' if vid.codec_ok else '^'
+                    mins = int(round(vid.duration / 60))
+                    line = f'{vid.doit:>3} {vid.net} {vid.bloat:5}{br_over} {res:>5}{ht_over}'
+                    line += f' {vid.codec:>{co_wid}}{co_over} {mins:>4} {1024*vid.gb:>6.0f}'
+                    line += f'   {basename}'
+                    if directory:
+                        line += f' ---> {dirname}'
+                    line_cache[id(vid)] = (vid, inputs, line)
+                if search_re and not search_re.search(line):
+                    continue
                 if vid.doit == '[X]':
                     stats.picked += 1
                 if vid.doit not in ('[X]', '[ ]', 'IP '):
@@ -433,10 +459,13 @@ class Converter:
                 lines.append(line)
                 # nses.append(vid)
                 self.visible_vids.append(vid)
-                if self.job and self.job.vid == vid:
+                for job in self.jobs:
+                    if job.vid is not vid:
+                        continue
                     jobcnt += 1
-                    lines.append(f'-----> {self.job.progress}')
-                    stats.progress_idx = len(self.visible_vids)
+                    lines.append(f'-----> {job.progress}')
+                    if jobcnt == 1: # position on the first running job
+                        stats.progress_idx = len(self.visible_vids)
                     self.visible_vids.append(None)
                     if self.win.pick_mode:
                         stats.progress_idx -= 1
@@ -560,10 +589,10 @@ class Converter:
                             self.probe_cache.set_anomaly(vid.filepath, None)
                         win.pick_pos += 1
                 if self.state == 'convert':
-                    if self.job:
-                        vid = self.job.vid
-                        self.job.ffsubproc.stop()
-                        self.job = None
+                    if self.jobs: # skip the oldest running job
+                        job = self.jobs.pop(0)
+                        vid = job.vid
+                        job.ffsubproc.stop()
                         vid.doit = '---'
                         self.probe_cache.set_anomaly(vid.filepath, '---')
 
@@ -589,10 +618,10 @@ class Converter:
                 if self.state == 'select':
                     sys.exit(0)
                 elif self.state == 'convert':
-                    if self.job:
-                        self.job.ffsubproc.stop()
-                        self.job.vid.doit = '[X]'
-                        self.job = None
+                    for job in self.jobs:
+                        job.ffsubproc.stop()
+                        job.vid.doit = '[X]'
+                    self.jobs = []
                     # Disable auto mode when user interrupts
                     if self.auto_mode_enabled:
                         self.auto_mode_enabled = False
@@ -604,40 +633,44 @@ class Converter:
         def advance_jobs():
             nonlocal self
 
-            if self.job and self.state in ('convert', 'help'):
-                while True:
-                    if self.opts.dry_run:
-                        delta = time.monotonic() - self.job.start_mono
-                        got = 0 if delta >= 3 else f'{delta=}'
-                    else:
-                        got = self.get_job_progress(self.job)
-                    if isinstance(got, str):
-                        self.job.progress = got
-                    elif isinstance(got, int):
-                        self.job.vid.doit = ' OK' if got == 0 else 'ERR'
-                        self.job.vid.doit_auto = self.job.vid.doit
-                        self.finish_transcode_job(
-                            success=bool(got == 0), job=self.job)
-                        dumped = asdict(self.job.vid)
-                        # asdict() automatically handles nested Probe dataclasses
-                        if got == 0:
-                            dumped['texts'] = []
-
-                        if self.opts.sample:
-                            title = 'SAMPLE'
-                        elif self.opts.dry_run:
-                            title = 'DRY-RUN'
+            if self.jobs and self.state in ('convert', 'help'):
+                for job in list(self.jobs):
+                    while True:
+                        if self.opts.dry_run:
+                            delta = time.monotonic() - job.start_mono
+                            got = 0 if delta >= 3 else f'{delta=}'
                         else:
-                            title = 'RE-ENCODE-TO-H265'
-
-                        lg.put('OK' if got == 0 else 'ERR',
-                            title + ' ', json.dumps(dumped, indent=4))
-                        self.job = None
-                        break # finished job
-                    else:
-                        break # no progress on job
-            if self.state == 'convert' and not self.job:
+                            got = self.get_job_progress(job)
+                        if isinstance(got, str):
+                            job.progress = got
+                        elif isinstance(got, int):
+                            job.vid.doit = ' OK' if got == 0 else 'ERR'
+                            job.vid.doit_auto = job.vid.doit
+                            self.finish_transcode_job(
+                                success=bool(got == 0), job=job)
+                            dumped = asdict(job.vid)
+                            # asdict() automatically handles nested Probe dataclasses
+                            if got == 0:
+                                dumped['texts'] = []
+
+                            if self.opts.sample:
+                                title = 'SAMPLE'
+                            elif self.opts.dry_run:
+                                title = 'DRY-RUN'
+                            else:
+                                title = 'RE-ENCODE-TO-H265'
+
+                            lg.put('OK' if got == 0 else 'ERR',
+                                title + ' ', json.dumps(dumped, indent=4))
+                            self.jobs.remove(job)
+                            break # finished job
+                        else:
+                            break # no progress on job
+            if self.state == 'convert' and len(self.jobs) < self.opts.jobs:
                 gonners = []
+                # vids can share a temp file (same standard name); such a vid
+                # stays queued until the job using it finishes
+                busy_temps = {job.temp_file for job in self.jobs}
                 for vid in self.visible_vids:
                     if not vid:
                         continue
@@ -645,9 +678,13 @@ class Converter:
                         if not os.path.isfile(vid.filepath):
                             gonners.append(vid)
                             continue
-                        if not self.job: # start only one job
+                        if len(self.jobs) < self.opts.jobs: # fill free job slots
+                            if self.job_handler.get_temp_file(vid) in busy_temps:
+                                continue
                             self.prev_time_encoded_secs = -1
-                            self.job = self.start_transcode_job(vid)
+                            job = self.start_transcode_job(vid)
+                            busy_temps.add(job.temp_file)
+                            self.jobs.append(job)
                             vid.doit = 'IP '
                 if gonners:  # any disappearing files?
                     vids = []
@@ -661,11 +698,11 @@ class Converter:
                     lg.err('videos disappeared before conversion:\n'
                         + json.dumps(gonners_data, indent=4))
 
-                if not self.job:
+                if not self.jobs:
                     # Check auto mode exit conditions
                     if self.auto_mode_enabled:
                         # Calculate current stats for vitals report
-                        _, stats = make_lines()
+                        _, stats, _ = make_lines()
 
                         # Check exit conditions
                         time_exceeded = False
@@ -723,7 +760,7 @@ class Converter:
         self.spins = spins = spin.default_obj
 
         self.win = win = ConsoleWindow(keys=spin.keys,
-                        body_rows=10+len(self.vids), ctrl_c_terminates=False)
+                        body_rows=10+len(self.vids)+self.opts.jobs, ctrl_c_terminates=False)
         curses.intrflush(False)
         self.state = 'select'
 
@@ -770,23 +807,10 @@ class Converter:
             print("Usage: rmbloat {options} {video_file}...")
             sys.exit(1)
 
-        # --- The main loop change is here ---
+        # Paths are absolute and nothing downstream depends on the working
+        # directory, so the files are processed without any chdir()
         for ppp in ppps:
-            input_file_path_str = ppp.video_file
-            file_dir, _ = os.path.split(input_file_path_str)
-            if not file_dir:
-                file_dir = os.path.abspath(os.path.dirname(input_file_path_str))
-
-            # Use a try...finally block to ensure you always change back.
-            try:
-                os.chdir(file_dir)
-                self.process_one_ppp(ppp)
-
-            except Exception:
-                raise
-                # print(f"An error occurred while processing {file_basename}: {e}")
-            finally:
-                os.chdir(self.original_cwd)
+            self.process_one_ppp(ppp)
         self.do_window_mode()
 
 
@@ -806,6 +830,7 @@ def main(args=None):
                                prefer_strategy='auto',
                                quality=28,
                                thread_cnt=4,
+                               jobs=1,
                         )
         vals = cfg.vals
         parser = argparse.ArgumentParser(
@@ -845,12 +870,16 @@ def main(args=None):
                     help=f'output quality (CRF) [dflt={vals.quality}]')
         parser.add_argument('-t', '--thread-cnt',
                     default=vals.thread_cnt, type=int,
-                    help='thread count for ffmpeg conversions'
+                    help='thread count for ffmpeg conversions (0=all cores)'
                         + f' [dflt={vals.thread_cnt}]')
+        parser.add_argument('-j', '--jobs',
+                    default=vals.jobs, type=int,
+                    help='number of conversions to run at once'
+                        + f' [dflt={vals.jobs}]')
 
         # run-time options
         parser.add_argument('-S', '--save-defaults', action='store_true',
-                    help='save the -B/-b/-p/-q/-a/-F/-m/-M options and file paths as defaults')
+                    help='save the -B/-b/-p/-q/-a/-F/-m/-M/-t/-j options and file paths as defaults')
         parser.add_argument('--auto-hr', type=float, default=None,
                     help='Auto mode: run unattended for specified hours, '
                          'auto-select [X] files and auto-start conversions')
@@ -915,7 +944,7 @@ def main(args=None):
                 print(f"An error occurred during exec: {e}", file=sys.stderr)
                 sys.exit(1)
         if opts.chooser_tests:
-            chooser = FfmpegChooser(force_pull=True)
+            chooser = FfmpegChooser(force_pull=True, detect_all=True)
 
             video_file = None
             if opts.files:
@@ -938,6 +967,8 @@ def main(args=None):
         if opts.sample:
             opts.dry_run = False # cannot have both
         opts.bloat_thresh = max(500, opts.bloat_thresh)
+        opts.jobs = max(1, opts.jobs)
+        opts.thread_cnt = max(0, opts.thread_cnt)
 
         Converter(opts, os.path.dirname(cfg.config_file_path)).main_loop()
     except Exception as exc:
@@ -0,0 +1,21 @@
+"""
+Tests for the --allowed-codecs decision
+"""
+from rmbloat.rmbloat import Converter
+
+
+def test_codec_allowed_known_choices():
+    assert Converter.codec_allowed('x265', 'hevc')
+    assert not Converter.codec_allowed('x265', 'h264')
+    assert Converter.codec_allowed('x26*', 'h264')
+    assert Converter.codec_allowed('all', 'mpeg4')
+
+
+def test_codec_allowed_not_a_codec_name():
+    assert Converter.codec_allowed('x265', '---')
+
+
+def test_codec_allowed_unknown_choice():
+    # e.g., a stale value in the ini file; must not raise
+    assert not Converter.codec_allowed('bogus', 'hevc')
+    assert Converter.codec_allowed('bogus', '---')
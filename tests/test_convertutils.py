@@ -0,0 +1,20 @@
+"""
+Tests for picking out the video files
+"""
+import pytest
+from rmbloat.ConvertUtils import is_valid_video_file
+
+
+@pytest.mark.parametrize('filename, expected', [
+    ('Show.mkv', True),
+    ('/videos/Show.MP4', True),
+    ('/videos.d/.hidden.mkv', True),
+    ('/videos/TEMP.Show.mkv', False),
+    ('Show.txt', False),
+    ('noext', False),
+    ('/videos.mkv/noext', False),
+    ('.mkv', False),  # a dotfile, not an extension (as with os.path.splitext)
+    ('/videos/.mkv', False),
+])
+def test_is_valid_video_file(filename, expected):
+    assert is_valid_video_file(filename) is expected
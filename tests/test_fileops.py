@@ -0,0 +1,33 @@
+"""
+Tests for renaming the companion files of a converted video
+"""
+from rmbloat import FileOps
+
+
+def touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+
+
+def test_bulk_rename_companions(tmp_path):
+    for name in ['Show.x264.en.srt', 'Show.x264.nfo', 'Show.x264.REFERENCE.srt',
+                 'Other.mkv']:
+        touch(tmp_path / name)
+    FileOps.bulk_rename('Show.x264.mkv', 'Show.x265.mkv', set(), root=str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        'Other.mkv', 'Show.x265.REFERENCE.srt', 'Show.x265.en.srt', 'Show.x265.nfo']
+
+
+def test_bulk_rename_skips_busy_paths(tmp_path):
+    # another job is converting 'Show.x264/Show.x264.part2.avi'
+    busy_src = tmp_path / 'Show.x264' / 'Show.x264.part2.avi'
+    busy_temp = tmp_path / 'TEMP.Show.x264.part2.mkv'
+    touch(busy_src)
+    touch(busy_temp)
+    touch(tmp_path / 'Show.x264.nfo')
+    ops = FileOps.bulk_rename('Show.x264.mkv', 'Show.x265.mkv', set(), root=str(tmp_path),
+                              busy_paths={str(busy_src), str(busy_temp)})
+    assert busy_src.exists()  # neither it nor its directory was renamed
+    assert busy_temp.exists()
+    assert (tmp_path / 'Show.x265.nfo').exists()
+    assert any(op.startswith('SKIP:') for op in ops)
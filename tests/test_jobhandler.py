@@ -0,0 +1,73 @@
+"""
+Tests for the file swap at the end of a conversion
+"""
+import os
+from types import SimpleNamespace
+import send2trash
+from rmbloat.JobHandler import JobHandler
+from rmbloat.Models import Job, PathProbePair, Vid
+from rmbloat.ProbeCache import Probe
+
+
+class FakeProbeCache:
+    """ Just enough of ProbeCache for finish_transcode_job() """
+    def __init__(self, probe):
+        self.probe = probe
+        self.anomalies = {}
+
+    def get(self, filepath):
+        return self.probe
+
+    def rename(self, old_path, new_path):
+        pass
+
+    def set_anomaly(self, filepath, anomaly):
+        self.anomalies[filepath] = anomaly
+
+
+def make_job(tmp_path, standard_name):
+    orig = tmp_path / 'Show.S01E01.x264.mkv'
+    orig.write_bytes(b'original')
+    ppp = PathProbePair(str(orig), Probe())
+    ppp.standard_name, ppp.do_rename = standard_name, True
+    vid = Vid()
+    vid.post_init(ppp)
+    vid.gb = 1.0
+    temp_file = tmp_path / f'TEMP.{standard_name}'
+    temp_file.write_bytes(b'converted')
+    return Job(vid, str(tmp_path / f'ORIG.{vid.filebase}'), str(temp_file), 60)
+
+
+def make_handler(probe):
+    opts = SimpleNamespace(dry_run=False, sample=False, keep_backup=False,
+                           min_shrink_pct=10)
+    return JobHandler(opts, chooser=None, probe_cache=FakeProbeCache(probe))
+
+
+def test_failed_trash_leaves_original_in_place(tmp_path, monkeypatch):
+    def fail_trash(path):
+        raise OSError('trash is full')
+    monkeypatch.setattr(send2trash, 'send2trash', fail_trash)
+
+    probe = Probe(codec='hevc')
+    probe.gb = 0.5
+    job = make_job(tmp_path, 'Show.S01E01.x265.mkv')
+    make_handler(probe).finish_transcode_job(True, job, lambda probe: False)
+
+    # nothing was swapped: the original and the converted temp file remain
+    assert (tmp_path / 'Show.S01E01.x264.mkv').read_bytes() == b'original'
+    assert (tmp_path / 'TEMP.Show.S01E01.x265.mkv').read_bytes() == b'converted'
+    assert not (tmp_path / 'Show.S01E01.x265.mkv').exists()
+    assert any(op.startswith('ERR: swap') for op in job.vid.ops)
+
+
+def test_trash_then_swap(tmp_path, monkeypatch):
+    monkeypatch.setattr(send2trash, 'send2trash', os.unlink)
+
+    probe = Probe(codec='hevc')
+    probe.gb = 0.5
+    job = make_job(tmp_path, 'Show.S01E01.x265.mkv')
+    make_handler(probe).finish_transcode_job(True, job, lambda probe: False)
+
+    assert not (tmp_path / 'Show.S01E01.x264.mkv').exists()
+    assert (tmp_path / 'Show.S01E01.x265.mkv').read_bytes() == b'converted'
@@ -0,0 +1,19 @@
+"""
+Tests for the batch probing of video files
+"""
+import time
+from rmbloat.ProbeCache import Probe, ProbeCache
+
+
+def test_batch_results_in_input_order(tmp_path, monkeypatch):
+    cache = ProbeCache(cache_dir_name=str(tmp_path))
+    paths = [f'/videos/{idx}.mkv' for idx in range(6)]
+
+    def slow_probe(file_path):
+        # the earlier the path, the later its probe completes
+        time.sleep(0.02 * (len(paths) - paths.index(file_path)))
+        return Probe(codec='h264', size_bytes=1000)
+    monkeypatch.setattr(cache, '_get_metadata_with_ffprobe', slow_probe)
+
+    results = cache.batch_get_or_probe(paths, max_workers=len(paths))
+    assert list(results) == paths